@@ -1,181 +1,315 @@
-# app.py
-from flask import Flask, request, jsonify
-from werkzeug.utils import secure_filename
-import os
-import io
-from flask_cors import CORS
-from pydantic import ValidationError
-
-# Assuming process_resume_from_bytes and other models are in resume_filter.py
-from resume_filter import (
-    process_resume_from_bytes, ResumeScore, get_recommendations, RecommendationList,
-    detect_red_flags, RedFlags, estimate_salary, SalaryEstimation,
-    check_background_consistency, ConsistencyCheck, calculate_fit_score, FitScore,
-    extract_text_from_pdf # Import for module processing
-)
-
-
-app = Flask(__name__)
-CORS(app)
-
-@app.route('/ping', methods=['GET'])
-def ping():
-    """Simple health check endpoint."""
-    return 'Server is alive!', 200
-
-@app.route('/screen', methods=['POST'])
-def screen_resume():
-    """
-    API endpoint to screen a single resume.
-    Expects a PDF file under 'resume' and a 'job_description' string.
-    Optional 'strictness', 'positive_factors', and 'negative_factors' parameters.
-    """
-    if 'resume' not in request.files:
-        return jsonify({"error": "No resume file provided"}), 400
-
-    if 'job_description' not in request.form:
-        return jsonify({"error": "No job description provided"}), 400
-
-    resume_file = request.files['resume']
-    job_description_prompt = request.form['job_description']
-    strictness_level = request.form.get('strictness', 'medium')
-    positive_factors = request.form.get('positive_factors', '') # NEW
-    negative_factors = request.form.get('negative_factors', '') # NEW
-
-    if resume_file.filename == '':
-        return jsonify({"error": "No selected file"}), 400
-
-    if resume_file:
-        resume_content = resume_file.read()
-
-        try:
-            # UPDATED: Pass new factors to the processing function
-            result: ResumeScore = process_resume_from_bytes(
-                job_description_prompt,
-                resume_content,
-                strictness_level,
-                positive_factors,
-                negative_factors
-            )
-            return jsonify(result.model_dump()), 200
-        except ValidationError as e:
-            return jsonify({"error": "Data validation error from LLM output", "details": e.errors()}), 500
-        except Exception as e:
-            return jsonify({"error": f"An error occurred during resume screening: {str(e)}"}), 500
-    return jsonify({"error": "Something went wrong during file upload processing"}), 500
-
-
-@app.route('/batch_screen', methods=['POST'])
-def batch_screen_resumes():
-    """
-    API endpoint to screen multiple resumes in a batch.
-    Expects multiple PDF files under 'resumes[]' and a 'job_description' string.
-    Optional 'strictness', 'positive_factors', and 'negative_factors' parameters.
-    """
-    if 'resumes[]' not in request.files:
-        return jsonify({"error": "No resume files provided"}), 400
-    if 'job_description' not in request.form:
-        return jsonify({"error": "No job description provided"}), 400
-
-    resume_files = request.files.getlist('resumes[]')
-    job_description_prompt = request.form['job_description']
-    strictness_level = request.form.get('strictness', 'medium')
-    positive_factors = request.form.get('positive_factors', '') # NEW
-    negative_factors = request.form.get('negative_factors', '') # NEW
-
-    if not resume_files:
-        return jsonify({"error": "No selected files"}), 400
-
-    results = []
-    for resume_file in resume_files:
-        filename = secure_filename(resume_file.filename)
-        try:
-            resume_content = resume_file.read()
-            # UPDATED: Pass new factors to the processing function
-            score: ResumeScore = process_resume_from_bytes(
-                job_description_prompt,
-                resume_content,
-                strictness_level,
-                positive_factors,
-                negative_factors
-            )
-            # Storing content as latin-1 string for JSON serialization to pass to modules
-            results.append({"filename": filename, "score": score.model_dump(), "resume_content": resume_content.decode('latin-1')})
-        except ValidationError as e:
-            results.append({"filename": filename, "error": "Data validation error from LLM output", "details": e.errors()})
-        except Exception as e:
-            results.append({"filename": filename, "error": f"Error processing resume: {str(e)}"})
-
-    return jsonify(results), 200
-
-# --- Other Endpoints (Unchanged) ---
-
-@app.route('/recommend', methods=['POST'])
-def recommend_candidates():
-    data = request.json
-    if not data or 'candidate_scores' not in data or 'num_recommendations' not in data:
-        return jsonify({"error": "Invalid request body. Expected 'candidate_scores' and 'num_recommendations'."}), 400
-    try:
-        recommendations: RecommendationList = get_recommendations(data['candidate_scores'], data['num_recommendations'])
-        return jsonify(recommendations.model_dump()), 200
-    except Exception as e:
-        return jsonify({"error": f"An error occurred during recommendation generation: {str(e)}"}), 500
-
-@app.route('/module/red_flags', methods=['POST'])
-def red_flags_detector():
-    data = request.json
-    if not data or 'resume_content' not in data:
-        return jsonify({"error": "Invalid request body. Expected 'resume_content'."}), 400
-    resume_content_bytes = data['resume_content'].encode('latin-1')
-    try:
-        resume_text = extract_text_from_pdf(io.BytesIO(resume_content_bytes))
-        if not resume_text: return jsonify({"error": "Could not extract text."}), 400
-        red_flags: RedFlags = detect_red_flags(resume_text)
-        return jsonify(red_flags.model_dump()), 200
-    except Exception as e:
-        return jsonify({"error": f"An error occurred: {str(e)}"}), 500
-
-@app.route('/module/salary_estimation', methods=['POST'])
-def salary_estimation_module():
-    data = request.json
-    if not data or 'job_description' not in data or 'resume_content' not in data:
-        return jsonify({"error": "Invalid request body."}), 400
-    resume_content_bytes = data['resume_content'].encode('latin-1')
-    try:
-        resume_text = extract_text_from_pdf(io.BytesIO(resume_content_bytes))
-        if not resume_text: return jsonify({"error": "Could not extract text."}), 400
-        salary_estimate: SalaryEstimation = estimate_salary(data['job_description'], resume_text)
-        return jsonify(salary_estimate.model_dump()), 200
-    except Exception as e:
-        return jsonify({"error": f"An error occurred: {str(e)}"}), 500
-
-@app.route('/module/background_consistency', methods=['POST'])
-def background_consistency_checker():
-    data = request.json
-    if not data or 'resume_content' not in data:
-        return jsonify({"error": "Invalid request body."}), 400
-    resume_content_bytes = data['resume_content'].encode('latin-1')
-    try:
-        resume_text = extract_text_from_pdf(io.BytesIO(resume_content_bytes))
-        if not resume_text: return jsonify({"error": "Could not extract text."}), 400
-        consistency_check: ConsistencyCheck = check_background_consistency(resume_text)
-        return jsonify(consistency_check.model_dump()), 200
-    except Exception as e:
-        return jsonify({"error": f"An error occurred: {str(e)}"}), 500
-
-@app.route('/module/candidate_fit', methods=['POST'])
-def candidate_fit_score():
-    data = request.json
-    if not data or 'job_description' not in data or 'resume_content' not in data:
-        return jsonify({"error": "Invalid request body."}), 400
-    resume_content_bytes = data['resume_content'].encode('latin-1')
-    try:
-        resume_text = extract_text_from_pdf(io.BytesIO(resume_content_bytes))
-        if not resume_text: return jsonify({"error": "Could not extract text."}), 400
-        fit_score: FitScore = calculate_fit_score(data['job_description'], resume_text)
-        return jsonify(fit_score.model_dump()), 200
-    except Exception as e:
-        return jsonify({"error": f"An error occurred: {str(e)}"}), 500
-
-if __name__ == '__main__':
+# app.py
+from flask import Flask, request, jsonify, Response
+from werkzeug.utils import secure_filename
+from asgiref.wsgi import WsgiToAsgi
+import asyncio
+import concurrent.futures
+import diskcache
+import hashlib
+import json
+import os
+import io
+import threading
+from flask_cors import CORS
+from pydantic import ValidationError
+
+# Assuming process_resume_from_bytes and other models are in resume_filter.py
+from resume_filter import (
+    process_resume_from_bytes, aprocess_resume_from_bytes, ResumeScore,
+    get_recommendations, RecommendationList,
+    detect_red_flags, RedFlags, estimate_salary, SalaryEstimation,
+    check_background_consistency, ConsistencyCheck, calculate_fit_score, FitScore,
+    extract_text_from_pdf, extract_text_from_pdf_bytes, # Import for module processing
+    get_cached_full_analysis, # NEW: fused analysis cache lookup for module endpoints
+    process_resumes_batch, aprocess_resumes_batch # NEW: batched scoring for /batch_screen
+)
+
+
+app = Flask(__name__)
+CORS(app)
+
+# Number of resumes scored per LLM call in /batch_screen
+BATCH_SIZE = 8
+
+# Server-side store of screened resumes keyed by content hash, so clients pass
+# an opaque resume_id to /module/* instead of round-tripping the PDF bytes as
+# latin-1 JSON on every call.
+RESUME_STORE = diskcache.Cache("./cache/resumes")
+RESUME_STORE_TTL_SECONDS = 86400
+
+# Process pool for batch PDF extraction: resumes parse in parallel across
+# cores without contending with the event loop. Created on first use so plain
+# single-resume deployments never fork workers.
+_PDF_POOL = None
+_PDF_POOL_LOCK = threading.Lock()
+
+def get_pdf_pool():
+    global _PDF_POOL
+    if _PDF_POOL is None:
+        # Lock so concurrent first requests don't each fork a pool
+        with _PDF_POOL_LOCK:
+            if _PDF_POOL is None:
+                _PDF_POOL = concurrent.futures.ProcessPoolExecutor(max_workers=os.cpu_count())
+    return _PDF_POOL
+
+def model_response(model, status: int = 200) -> Response:
+    """Serialize a Pydantic model straight to JSON via pydantic-core.
+
+    Skips jsonify's model -> dict -> json double pass.
+    """
+    return Response(model.model_dump_json(), status=status, mimetype='application/json')
+
+def store_resume(resume_content: bytes, resume_text: str) -> str:
+    resume_id = hashlib.blake2b(resume_content, digest_size=16).hexdigest()
+    RESUME_STORE.set(resume_id, (resume_content, resume_text), expire=RESUME_STORE_TTL_SECONDS)
+    return resume_id
+
+def load_resume(data):
+    """Resolve (resume_bytes, resume_text) from a module request body.
+
+    Prefers the opaque 'resume_id' issued by /batch_screen; falls back to the
+    legacy latin-1 'resume_content' blob for older clients (text is then
+    extracted on demand). Returns (None, None) when neither resolves.
+    """
+    resume_id = data.get('resume_id')
+    if resume_id:
+        entry = RESUME_STORE.get(resume_id)
+        if entry is not None:
+            return entry
+        return None, None
+    resume_content = data.get('resume_content')
+    if resume_content is not None:
+        resume_content_bytes = resume_content.encode('latin-1')
+        return resume_content_bytes, extract_text_from_pdf(io.BytesIO(resume_content_bytes))
+    return None, None
+
+def parse_module_request():
+    """Resolve (params, resume_bytes, resume_text) for a /module/* request.
+
+    Accepts multipart/form-data with the PDF under 'resume' — raw bytes, no
+    JSON parse or latin-1 re-encode pass over the file — or a JSON body with
+    'resume_id' / the legacy 'resume_content' blob.
+    """
+    if 'resume' in request.files:
+        resume_bytes = request.files['resume'].read()
+        return request.form, resume_bytes, extract_text_from_pdf(io.BytesIO(resume_bytes))
+    data = request.get_json(silent=True) or {}
+    resume_bytes, resume_text = load_resume(data)
+    return data, resume_bytes, resume_text
+
+@app.route('/ping', methods=['GET'])
+def ping():
+    """Simple health check endpoint."""
+    return 'Server is alive!', 200
+
+@app.route('/screen', methods=['POST'])
+async def screen_resume():
+    """
+    API endpoint to screen a single resume.
+    Expects a PDF file under 'resume' and a 'job_description' string.
+    Optional 'strictness', 'positive_factors', and 'negative_factors' parameters.
+    """
+    if 'resume' not in request.files:
+        return jsonify({"error": "No resume file provided"}), 400
+
+    if 'job_description' not in request.form:
+        return jsonify({"error": "No job description provided"}), 400
+
+    resume_file = request.files['resume']
+    job_description_prompt = request.form['job_description']
+    strictness_level = request.form.get('strictness', 'medium')
+    positive_factors = request.form.get('positive_factors', '') # NEW
+    negative_factors = request.form.get('negative_factors', '') # NEW
+
+    if resume_file.filename == '':
+        return jsonify({"error": "No selected file"}), 400
+
+    if resume_file:
+        resume_content = resume_file.read()
+
+        try:
+            # UPDATED: async variant overlaps PDF parsing (worker thread) with LLM IO
+            result: ResumeScore = await aprocess_resume_from_bytes(
+                job_description_prompt,
+                resume_content,
+                strictness_level,
+                positive_factors,
+                negative_factors
+            )
+            return model_response(result)
+        except ValidationError as e:
+            return jsonify({"error": "Data validation error from LLM output", "details": e.errors()}), 500
+        except Exception as e:
+            return jsonify({"error": f"An error occurred during resume screening: {str(e)}"}), 500
+    return jsonify({"error": "Something went wrong during file upload processing"}), 500
+
+
+@app.route('/batch_screen', methods=['POST'])
+async def batch_screen_resumes():
+    """
+    API endpoint to screen multiple resumes in a batch.
+    Expects multiple PDF files under 'resumes[]' and a 'job_description' string.
+    Optional 'strictness', 'positive_factors', and 'negative_factors' parameters.
+    Batches are screened concurrently; PDF parsing is offloaded to threads.
+    """
+    if 'resumes[]' not in request.files:
+        return jsonify({"error": "No resume files provided"}), 400
+    if 'job_description' not in request.form:
+        return jsonify({"error": "No job description provided"}), 400
+
+    resume_files = request.files.getlist('resumes[]')
+    job_description_prompt = request.form['job_description']
+    strictness_level = request.form.get('strictness', 'medium')
+    positive_factors = request.form.get('positive_factors', '') # NEW
+    negative_factors = request.form.get('negative_factors', '') # NEW
+
+    if not resume_files:
+        return jsonify({"error": "No selected files"}), 400
+
+    # UPDATED: extract all texts first (in worker threads), then score resumes
+    # in batched LLM calls fired concurrently with asyncio.gather so the
+    # wall-clock cost is roughly one LLM round-trip regardless of batch count.
+    file_contents = []  # (filename, resume_content)
+    results = []
+    for resume_file in resume_files:
+        filename = secure_filename(resume_file.filename)
+        try:
+            file_contents.append((filename, resume_file.read()))
+        except Exception as e:
+            results.append({"filename": filename, "error": f"Error processing resume: {str(e)}"})
+
+    # UPDATED: extraction fans out over a process pool, one resume per worker
+    loop = asyncio.get_running_loop()
+    texts = await asyncio.gather(*[
+        loop.run_in_executor(get_pdf_pool(), extract_text_from_pdf_bytes, resume_content)
+        for _, resume_content in file_contents
+    ])
+
+    extracted = []  # (filename, resume_content, resume_text)
+    for (filename, resume_content), resume_text in zip(file_contents, texts):
+        if not resume_text:
+            results.append({"filename": filename, "error": "Could not extract text from the provided resume PDF bytes."})
+        else:
+            extracted.append((filename, resume_content, resume_text))
+
+    batches = [extracted[start:start + BATCH_SIZE] for start in range(0, len(extracted), BATCH_SIZE)]
+    batch_outcomes = await asyncio.gather(*[
+        aprocess_resumes_batch(
+            job_description_prompt,
+            [(filename, resume_text) for filename, _, resume_text in batch],
+            strictness_level,
+            positive_factors,
+            negative_factors
+        )
+        for batch in batches
+    ], return_exceptions=True)
+
+    for batch, outcome in zip(batches, batch_outcomes):
+        if isinstance(outcome, ValidationError):
+            for filename, _, _ in batch:
+                results.append({"filename": filename, "error": "Data validation error from LLM output", "details": outcome.errors()})
+        elif isinstance(outcome, Exception):
+            for filename, _, _ in batch:
+                results.append({"filename": filename, "error": f"Error processing resume: {str(outcome)}"})
+        else:
+            for (filename, resume_content, resume_text), score in zip(batch, outcome):
+                # UPDATED: store bytes + text server-side and hand back an opaque id
+                resume_id = store_resume(resume_content, resume_text)
+                results.append({"filename": filename, "score": score, "resume_id": resume_id})
+
+    # UPDATED: serialize scores with pydantic-core instead of re-walking dicts
+    item_jsons = []
+    for item in results:
+        if isinstance(item.get("score"), ResumeScore):
+            item_jsons.append(
+                '{"filename":%s,"score":%s,"resume_id":%s}'
+                % (json.dumps(item["filename"]), item["score"].model_dump_json(), json.dumps(item["resume_id"]))
+            )
+        else:
+            item_jsons.append(json.dumps(item))
+    return Response('[' + ','.join(item_jsons) + ']', status=200, mimetype='application/json')
+
+# --- Other Endpoints (Unchanged) ---
+
+@app.route('/recommend', methods=['POST'])
+def recommend_candidates():
+    data = request.json
+    if not data or 'candidate_scores' not in data or 'num_recommendations' not in data:
+        return jsonify({"error": "Invalid request body. Expected 'candidate_scores' and 'num_recommendations'."}), 400
+    try:
+        # 'narrative' opts in to LLM-written rationales; default is local synthesis
+        recommendations: RecommendationList = get_recommendations(
+            data['candidate_scores'], data['num_recommendations'],
+            narrative=bool(data.get('narrative', False))
+        )
+        return model_response(recommendations)
+    except Exception as e:
+        return jsonify({"error": f"An error occurred during recommendation generation: {str(e)}"}), 500
+
+@app.route('/module/red_flags', methods=['POST'])
+def red_flags_detector():
+    try:
+        data, resume_content_bytes, resume_text = parse_module_request()
+        if resume_content_bytes is None:
+            return jsonify({"error": "Invalid request. Expected a 'resume' file, 'resume_id', or 'resume_content'."}), 400
+        # NEW: the fused screening call already produced this analysis
+        cached = get_cached_full_analysis(resume_content_bytes)
+        if cached is not None:
+            return model_response(cached.red_flags)
+        if not resume_text: return jsonify({"error": "Could not extract text."}), 400
+        red_flags: RedFlags = detect_red_flags(resume_text)
+        return model_response(red_flags)
+    except Exception as e:
+        return jsonify({"error": f"An error occurred: {str(e)}"}), 500
+
+@app.route('/module/salary_estimation', methods=['POST'])
+def salary_estimation_module():
+    try:
+        data, resume_content_bytes, resume_text = parse_module_request()
+        if resume_content_bytes is None or 'job_description' not in data:
+            return jsonify({"error": "Invalid request body."}), 400
+        cached = get_cached_full_analysis(resume_content_bytes, data['job_description'])
+        if cached is not None:
+            return model_response(cached.salary_estimation)
+        if not resume_text: return jsonify({"error": "Could not extract text."}), 400
+        salary_estimate: SalaryEstimation = estimate_salary(data['job_description'], resume_text)
+        return model_response(salary_estimate)
+    except Exception as e:
+        return jsonify({"error": f"An error occurred: {str(e)}"}), 500
+
+@app.route('/module/background_consistency', methods=['POST'])
+def background_consistency_checker():
+    try:
+        data, resume_content_bytes, resume_text = parse_module_request()
+        if resume_content_bytes is None:
+            return jsonify({"error": "Invalid request. Expected a 'resume' file, 'resume_id', or 'resume_content'."}), 400
+        cached = get_cached_full_analysis(resume_content_bytes)
+        if cached is not None:
+            return model_response(cached.consistency_check)
+        if not resume_text: return jsonify({"error": "Could not extract text."}), 400
+        consistency_check: ConsistencyCheck = check_background_consistency(resume_text)
+        return model_response(consistency_check)
+    except Exception as e:
+        return jsonify({"error": f"An error occurred: {str(e)}"}), 500
+
+@app.route('/module/candidate_fit', methods=['POST'])
+def candidate_fit_score():
+    try:
+        data, resume_content_bytes, resume_text = parse_module_request()
+        if resume_content_bytes is None or 'job_description' not in data:
+            return jsonify({"error": "Invalid request body."}), 400
+        cached = get_cached_full_analysis(resume_content_bytes, data['job_description'])
+        if cached is not None:
+            return model_response(cached.fit_score)
+        if not resume_text: return jsonify({"error": "Could not extract text."}), 400
+        fit_score: FitScore = calculate_fit_score(data['job_description'], resume_text)
+        return model_response(fit_score)
+    except Exception as e:
+        return jsonify({"error": f"An error occurred: {str(e)}"}), 500
+
+# ASGI entry point so IO-bound requests (LLM calls, PDF parsing threads) don't
+# pin a worker each: run with `uvicorn app:asgi_app --workers 4`.
+asgi_app = WsgiToAsgi(app)
+
+if __name__ == '__main__':
     app.run(debug=True, port=5000)
\ No newline at end of file
@@ -1,96 +1,456 @@
 # resume_filter.py
+import asyncio
+import concurrent.futures
+import functools
+import hashlib
+import heapq
 import json
 import os
-import pdfplumber
-from typing import List, Dict, Any, Optional
+import fitz  # PyMuPDF
+import re
+from collections import OrderedDict
+from typing import Dict, List, Any, Optional, Tuple
 from pydantic import BaseModel, Field
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.prompts import ChatPromptTemplate
 from dotenv import load_dotenv
 import io
 
+import diskcache
+
+from semantic_cache import SemanticCache
+
 load_dotenv()
 
+# Persistent exact-match cache: byte-identical re-submissions (same resume,
+# JD and tuning factors) are served from disk with zero LLM calls, surviving
+# server restarts. Entries expire after a day.
+_disk_cache = diskcache.Cache("./cache/scores")
+_DISK_CACHE_TTL_SECONDS = 86400
+
+def _disk_cache_key(*parts) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        if isinstance(part, str):
+            part = part.encode('utf-8')
+        digest.update(part or b"")
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+def _disk_cached(model_cls, key: str, compute):
+    """Return model_cls parsed from the disk cache, or compute and store it."""
+    cached = _disk_cache.get(key)
+    if cached is not None:
+        return model_cls.model_validate_json(cached)
+    result = compute()
+    _disk_cache.set(key, result.model_dump_json(), expire=_DISK_CACHE_TTL_SECONDS)
+    return result
+
 # --- Simplified Pydantic Models ---
 
-# UPDATED: Simplified the main scoring model
+# UPDATED: Simplified the main scoring model. Field descriptions are kept
+# terse because the JSON schema is sent with every structured-output call;
+# the output rules (single sentence, 80-word cap, etc.) live in the system
+# prompts instead of being repeated per field.
 class ResumeScore(BaseModel):
-    name: str = Field(description="The name of the candidate found in the resume.")
-    technical_score: int = Field(..., description="Score from 0–10 for technical skills.")
-    technical_reason: str = Field(description="A single, succinct sentence explaining the technical score.")
-    softskills_score: int = Field(..., description="Score from 0–10 for soft skills.")
-    softskills_reason: str = Field(description="A single, succinct sentence explaining the soft skills score.")
-    experience_and_alignment_score: int = Field(..., description="Score from 0–10 for relevant experience and alignment with employer needs.")
-    experience_and_alignment_reason: str = Field(description="A single, succinct sentence explaining the experience and alignment score.")
-    positive_highlights: Optional[str] = Field(None, description="A single sentence highlighting strengths based on 'Positive Factors'.")
-    negative_highlights: Optional[str] = Field(None, description="A single sentence highlighting weaknesses based on 'Negative Factors'.")
-    aggregate_score: float = Field(description="Overall weighted aggregate score of the resume (0-10).")
+    name: str = Field(description="Candidate name.")
+    technical_score: int = Field(..., description="Technical score 0-10.")
+    technical_reason: str = Field(description="One-line reason.")
+    softskills_score: int = Field(..., description="Soft skills score 0-10.")
+    softskills_reason: str = Field(description="One-line reason.")
+    experience_and_alignment_score: int = Field(..., description="Experience/alignment score 0-10.")
+    experience_and_alignment_reason: str = Field(description="One-line reason.")
+    positive_highlights: Optional[str] = Field(None, description="One-line 'Positive Factors' highlight.")
+    negative_highlights: Optional[str] = Field(None, description="One-line 'Negative Factors' highlight.")
+    aggregate_score: float = Field(description="Weighted aggregate 0-10.")
+
+# NEW: wrapper so one LLM call can score a whole batch of resumes
+class BatchResumeScores(BaseModel):
+    results: List[ResumeScore] = Field(description="One score per candidate, in order.")
 
 class CandidateRecommendation(BaseModel):
-    name: str = Field(description="Name of the recommended candidate.")
-    score: float = Field(description="Aggregate score of the candidate.")
-    reason: str = Field(description="Reason for recommending this candidate.")
+    name: str = Field(description="Candidate name.")
+    score: float = Field(description="Aggregate score.")
+    reason: str = Field(description="One-line reason.")
 
 class RecommendationList(BaseModel):
-    recommendations: List[CandidateRecommendation] = Field(description="List of recommended candidates.")
+    recommendations: List[CandidateRecommendation] = Field(description="Recommended candidates.")
 
 # --- UPDATED Module Models for Conciseness ---
 
 class RedFlags(BaseModel):
-    red_flags_found: bool = Field(description="True if any red flags were found, False otherwise.")
-    summary: str = Field(description="A concise, single-paragraph summary (max 80 words) of any red flags detected, or a confirmation that none were found.")
+    red_flags_found: bool = Field(description="True if any red flags found.")
+    summary: str = Field(description="One-paragraph summary.")
 
 class SalaryEstimation(BaseModel):
-    estimated_salary_range: str = Field(description="Estimated annual salary range (e.g., '$70,000 - $90,000').")
-    summary: str = Field(description="A concise, single-paragraph summary (max 80 words) justifying the salary estimation based on the candidate's profile and job description.")
+    estimated_salary_range: str = Field(description="Annual range, e.g. '$70,000 - $90,000'.")
+    summary: str = Field(description="One-paragraph justification.")
 
 class ConsistencyCheck(BaseModel):
-    inconsistencies_found: bool = Field(description="True if any inconsistencies were found, False otherwise.")
-    summary: str = Field(description="A concise, single-paragraph summary (max 80 words) of any background inconsistencies, or a confirmation of consistency.")
+    inconsistencies_found: bool = Field(description="True if any inconsistencies found.")
+    summary: str = Field(description="One-paragraph summary.")
 
 class FitScore(BaseModel):
-    role_fit_score: int = Field(..., description="Score from 0-10 for role fit.")
-    culture_fit_score: int = Field(..., description="Score from 0-10 for culture fit.")
-    summary: str = Field(description="A concise, single-paragraph summary (max 80 words) assessing the candidate's overall fit for the role and culture.")
+    role_fit_score: int = Field(..., description="Role fit 0-10.")
+    culture_fit_score: int = Field(..., description="Culture fit 0-10.")
+    summary: str = Field(description="One-paragraph fit summary.")
+
+# NEW: Union model so one LLM call covers scoring plus all four analysis modules.
+class FullAnalysis(BaseModel):
+    score: ResumeScore = Field(description="Core resume scores.")
+    red_flags: RedFlags = Field(description="Red flag analysis.")
+    salary_estimation: SalaryEstimation = Field(description="Salary estimate.")
+    consistency_check: ConsistencyCheck = Field(description="Consistency analysis.")
+    fit_score: FitScore = Field(description="Role/culture fit.")
 
 
 # --- Core Functions ---
 
+# Exact-match LRU cache for extracted PDF text, keyed by a short hash of the
+# raw bytes so module calls on an already-screened resume skip the re-parse.
+_PDF_TEXT_CACHE_MAX = 512
+_pdf_text_cache: "OrderedDict[bytes, str]" = OrderedDict()
+
+# Prompt cost and latency scale with input tokens, so extracted text is
+# whitespace-collapsed, stripped of boilerplate and capped (~8K tokens at
+# roughly 4 chars/token) before it reaches any chain.
+_MAX_RESUME_CHARS = 32000
+_BOILERPLATE_PATTERNS = [
+    re.compile(r"references\s+(are\s+)?available\s+(up)?on\s+request\.?", re.IGNORECASE),
+    re.compile(r"^\s*page\s+\d+(\s+of\s+\d+)?\s*$", re.IGNORECASE | re.MULTILINE),
+    re.compile(r"^\s*\d+\s*$", re.MULTILINE),  # bare page numbers
+]
+
+def _clean_resume_text(text: str) -> str:
+    for pattern in _BOILERPLATE_PATTERNS:
+        text = pattern.sub("", text)
+    text = re.sub(r"[ \t]+", " ", text)
+    text = re.sub(r"\n\s*\n+", "\n", text)
+    return text.strip()[:_MAX_RESUME_CHARS]
+
+# Resumes at or above this page count are extracted page-parallel; below it
+# the per-thread document-open overhead outweighs the win.
+_PARALLEL_PAGE_THRESHOLD = 4
+_PAGE_EXTRACT_WORKERS = 4
+
+def extract_text_from_pdf_bytes(pdf_bytes: bytes) -> str:
+    """Extract text from raw PDF bytes.
+
+    Module-level and bytes-in/str-out so it can be shipped to a
+    ProcessPoolExecutor worker (everything involved pickles cleanly).
+    """
+    return extract_text_from_pdf(io.BytesIO(pdf_bytes))
+
+def _extract_page_text(pdf_bytes: bytes, page_number: int) -> str:
+    # fitz Documents are not safe to share across threads, so each worker
+    # opens its own handle; MuPDF loads pages lazily, keeping this cheap.
+    with fitz.open(stream=pdf_bytes, filetype="pdf") as pdf:
+        return pdf[page_number].get_text("text")
+
 def extract_text_from_pdf(pdf_file_object: io.BytesIO) -> str:
+    pdf_bytes = pdf_file_object.getvalue()
+    cache_key = hashlib.blake2b(pdf_bytes, digest_size=16).digest()
+    cached = _pdf_text_cache.get(cache_key)
+    if cached is not None:
+        _pdf_text_cache.move_to_end(cache_key)
+        return cached
+
     text = ""
     try:
-        with pdfplumber.open(pdf_file_object) as pdf:
-            for page in pdf.pages:
-                text += page.extract_text() or ""
+        # PyMuPDF's native text extraction is an order of magnitude faster
+        # than the pure-Python pdfplumber/pdfminer stack it replaces.
+        with fitz.open(stream=pdf_bytes, filetype="pdf") as pdf:
+            page_count = pdf.page_count
+            if page_count < _PARALLEL_PAGE_THRESHOLD:
+                text = "\n".join(page.get_text("text") for page in pdf)
+        if page_count >= _PARALLEL_PAGE_THRESHOLD:
+            # MuPDF releases the GIL during native extraction, so pages of
+            # longer resumes are pulled in parallel.
+            with concurrent.futures.ThreadPoolExecutor(max_workers=_PAGE_EXTRACT_WORKERS) as executor:
+                texts = list(executor.map(
+                    lambda page_number: _extract_page_text(pdf_bytes, page_number),
+                    range(page_count),
+                ))
+            text = "\n".join(texts)
     except Exception as e:
         print(f"Error extracting text from PDF: {e}")
+    text = _clean_resume_text(text)
+    if text:
+        _pdf_text_cache[cache_key] = text
+        if len(_pdf_text_cache) > _PDF_TEXT_CACHE_MAX:
+            _pdf_text_cache.popitem(last=False)
     return text
 
+@functools.lru_cache(maxsize=1)
 def get_llm():
+    # Built once per process: the client (and its underlying channel) is
+    # reused across requests instead of being reconstructed per call.
     google_api_key = os.getenv("GOOGLE_API_KEY")
     if not google_api_key:
         raise ValueError("GOOGLE_API_KEY environment variable not set.")
     return ChatGoogleGenerativeAI(model="gemini-1.5-flash", temperature=0.0, google_api_key=google_api_key)
 
-# --- UPDATED Core Screening Function ---
-def process_resume_from_bytes(
+# --- Fused Analysis Cache ---
+# One LLM call per (resume, JD, tuning-parameters) combination covers scoring
+# plus all four deeper-analysis modules; the result is cached server-side so
+# module endpoints become lookups. Strictness and the positive/negative
+# factors are part of the key, otherwise re-screening with different knobs
+# would return the stale analysis.
+_full_analysis_cache: Dict[Tuple[str, str, str], FullAnalysis] = {}
+
+# Semantic layer behind the exact-hash cache: near-identical (JD, resume) pairs
+# (e.g. iterative JD tweaks over the same resume pool) also skip the LLM call.
+_semantic_analysis_cache = SemanticCache(threshold=0.92)
+
+def _semantic_cache_text(
+    job_description_prompt: str,
+    resume_text: str,
+    strictness_level: str,
+    positive_factors: Optional[str],
+    negative_factors: Optional[str],
+) -> str:
+    return "\x00".join([
+        strictness_level,
+        positive_factors or "",
+        negative_factors or "",
+        job_description_prompt,
+        resume_text[:2048],
+    ])
+
+def _analysis_cache_key(
+    job_description_prompt: str,
+    resume_bytes: bytes,
+    strictness_level: str,
+    positive_factors: Optional[str],
+    negative_factors: Optional[str],
+) -> Tuple[str, str, str]:
+    return (
+        hashlib.sha256(resume_bytes).hexdigest(),
+        hashlib.sha256(job_description_prompt.encode('utf-8')).hexdigest(),
+        _disk_cache_key(strictness_level, positive_factors, negative_factors),
+    )
+
+def get_cached_full_analysis(resume_bytes: bytes, job_description_prompt: Optional[str] = None) -> Optional[FullAnalysis]:
+    """Return a cached FullAnalysis for this resume, if one exists.
+
+    Matches the most recent entry for the resume bytes (and job description
+    when given); modules don't know the tuning parameters, so any parameter
+    variant is accepted.
+    """
+    resume_hash = hashlib.sha256(resume_bytes).hexdigest()
+    jd_hash = (hashlib.sha256(job_description_prompt.encode('utf-8')).hexdigest()
+               if job_description_prompt is not None else None)
+    for (cached_resume_hash, cached_jd_hash, _), analysis in reversed(list(_full_analysis_cache.items())):
+        if cached_resume_hash == resume_hash and (jd_hash is None or cached_jd_hash == jd_hash):
+            return analysis
+    return None
+
+# --- UPDATED Core Screening Functions ---
+# Prompts are module-level constants and chains are built once per process
+# (lazily, since the LLM client needs the API key); both are immutable and
+# keeping the system prefix byte-stable also lets the provider's prompt cache
+# hit across requests.
+
+# UPDATED: one multi-task prompt replaces the previous five separate calls
+_FULL_ANALYSIS_PROMPT = ChatPromptTemplate.from_messages(
+        [
+            ("system", """You are an expert AI resume screener. Evaluate a resume against a job description with extreme conciseness to save tokens. Complete ALL of the sections below in one pass.
+
+            **Section 1 - Scoring:**
+            - For all 'reason' and 'highlights' fields, you MUST provide a single, succinct sentence.
+            - Do not speculate or add any information not directly supported by the resume.
+            - Calculate a weighted aggregate score: Technical (50%), Experience & Alignment (30%), Soft Skills (20%).
+            - **Strictness Level ({strictness_level}):** Apply this level of scrutiny.
+            - **Positive Factors to reward:** {positive_factors}
+            - **Negative Factors to penalize:** {negative_factors}
+
+            **Section 2 - Red Flags:**
+            Analyze the resume for red flags (job hopping, gaps, buzzwords, inconsistencies). Provide a boolean `red_flags_found` and a concise, single-paragraph summary (max 80 words).
+
+            **Section 3 - Salary Estimation:**
+            Based on the job and resume, provide an estimated annual salary range in India and a concise, single-paragraph summary (max 80 words) justifying it.
+
+            **Section 4 - Background Consistency:**
+            Analyze the resume for inconsistencies in education, job titles, and dates. Provide a boolean `inconsistencies_found` and a concise, single-paragraph summary (max 80 words).
+
+            **Section 5 - Candidate Fit:**
+            Provide a Role Fit score (0-10), a Culture Fit score (0-10), and a concise, single-paragraph summary (max 80 words).
+
+            Provide your assessment in the specified JSON format.
+            """),
+            ("human", """
+            **Job Description:**
+            {job_description}
+            ---
+            **Candidate Resume Text:**
+            {resume_text}
+            ---
+            Evaluate the resume and provide the structured output, adhering strictly to the conciseness rules.
+            """)
+    ]
+)
+
+@functools.lru_cache(maxsize=1)
+def _full_analysis_chain():
+    return _FULL_ANALYSIS_PROMPT | get_llm().with_structured_output(FullAnalysis)
+
+def _build_full_analysis_call(
+    job_description_prompt: str,
+    resume_text: str,
+    strictness_level: str,
+    positive_factors: Optional[str],
+    negative_factors: Optional[str],
+):
+    """Build the (chain, inputs) pair shared by the sync and async analysis paths."""
+    inputs = {
+        "strictness_level": strictness_level,
+        "job_description": job_description_prompt,
+        "resume_text": resume_text,
+        "positive_factors": positive_factors or "No specific positive factors provided.",
+        "negative_factors": negative_factors or "No specific negative factors provided.",
+    }
+    return _full_analysis_chain(), inputs
+
+def _check_semantic_cache(cache_key: Tuple[str, str, str], semantic_text: str) -> Optional[FullAnalysis]:
+    """Semantic cache: near-duplicate (JD, resume) pairs reuse the cached response."""
+    cached_json = _semantic_analysis_cache.get(semantic_text)
+    if cached_json is None:
+        return None
+    analysis = FullAnalysis.model_validate_json(cached_json)
+    _full_analysis_cache[cache_key] = analysis
+    return analysis
+
+def _check_disk_cache(cache_key: Tuple[str, str, str], disk_key: str) -> Optional[FullAnalysis]:
+    cached_json = _disk_cache.get(disk_key)
+    if cached_json is None:
+        return None
+    analysis = FullAnalysis.model_validate_json(cached_json)
+    _full_analysis_cache[cache_key] = analysis
+    return analysis
+
+def _finalize_full_analysis(
+    analysis: FullAnalysis,
+    cache_key: Tuple[str, str, str],
+    disk_key: str,
+    semantic_text: str,
+) -> FullAnalysis:
+    # Recalculate aggregate score to ensure consistency with the new weights
+    weighted_score = (
+        (analysis.score.technical_score * 0.5) +
+        (analysis.score.experience_and_alignment_score * 0.3) +
+        (analysis.score.softskills_score * 0.2)
+    )
+    analysis.score.aggregate_score = round(weighted_score, 2)
+    _full_analysis_cache[cache_key] = analysis
+    analysis_json = analysis.model_dump_json()
+    _disk_cache.set(disk_key, analysis_json, expire=_DISK_CACHE_TTL_SECONDS)
+    _semantic_analysis_cache.set(semantic_text, analysis_json)
+    return analysis
+
+def get_full_analysis(
     job_description_prompt: str,
     resume_bytes: bytes,
     strictness_level: str = "medium",
     positive_factors: Optional[str] = None,
     negative_factors: Optional[str] = None,
-) -> ResumeScore:
-    llm = get_llm()
+) -> FullAnalysis:
+    """Run the fused screening + analysis prompt, caching by (resume, JD, parameters) hash."""
+    cache_key = _analysis_cache_key(job_description_prompt, resume_bytes, strictness_level, positive_factors, negative_factors)
+    cached = _full_analysis_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    disk_key = _disk_cache_key(job_description_prompt, resume_bytes, strictness_level, positive_factors, negative_factors)
+    cached = _check_disk_cache(cache_key, disk_key)
+    if cached is not None:
+        return cached
+
     resume_text = extract_text_from_pdf(io.BytesIO(resume_bytes))
     if not resume_text:
         raise ValueError("Could not extract text from the provided resume PDF bytes.")
 
-    # UPDATED prompt to be more direct and demand conciseness
-    resume_scoring_prompt = ChatPromptTemplate.from_messages(
+    semantic_text = _semantic_cache_text(job_description_prompt, resume_text, strictness_level, positive_factors, negative_factors)
+    cached = _check_semantic_cache(cache_key, semantic_text)
+    if cached is not None:
+        return cached
+
+    chain, inputs = _build_full_analysis_call(
+        job_description_prompt, resume_text, strictness_level, positive_factors, negative_factors
+    )
+    return _finalize_full_analysis(chain.invoke(inputs), cache_key, disk_key, semantic_text)
+
+# NEW: async variant so batch callers can overlap PDF parsing with LLM waits
+async def aget_full_analysis(
+    job_description_prompt: str,
+    resume_bytes: bytes,
+    strictness_level: str = "medium",
+    positive_factors: Optional[str] = None,
+    negative_factors: Optional[str] = None,
+) -> FullAnalysis:
+    """Async counterpart of get_full_analysis; PDF parsing runs in a worker thread."""
+    cache_key = _analysis_cache_key(job_description_prompt, resume_bytes, strictness_level, positive_factors, negative_factors)
+    cached = _full_analysis_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    disk_key = _disk_cache_key(job_description_prompt, resume_bytes, strictness_level, positive_factors, negative_factors)
+    cached = _check_disk_cache(cache_key, disk_key)
+    if cached is not None:
+        return cached
+
+    resume_text = await asyncio.to_thread(extract_text_from_pdf, io.BytesIO(resume_bytes))
+    if not resume_text:
+        raise ValueError("Could not extract text from the provided resume PDF bytes.")
+
+    semantic_text = _semantic_cache_text(job_description_prompt, resume_text, strictness_level, positive_factors, negative_factors)
+    cached = _check_semantic_cache(cache_key, semantic_text)
+    if cached is not None:
+        return cached
+
+    chain, inputs = _build_full_analysis_call(
+        job_description_prompt, resume_text, strictness_level, positive_factors, negative_factors
+    )
+    return _finalize_full_analysis(await chain.ainvoke(inputs), cache_key, disk_key, semantic_text)
+
+def process_resume_from_bytes(
+    job_description_prompt: str,
+    resume_bytes: bytes,
+    strictness_level: str = "medium",
+    positive_factors: Optional[str] = None,
+    negative_factors: Optional[str] = None,
+) -> ResumeScore:
+    return get_full_analysis(
+        job_description_prompt,
+        resume_bytes,
+        strictness_level,
+        positive_factors,
+        negative_factors,
+    ).score
+
+async def aprocess_resume_from_bytes(
+    job_description_prompt: str,
+    resume_bytes: bytes,
+    strictness_level: str = "medium",
+    positive_factors: Optional[str] = None,
+    negative_factors: Optional[str] = None,
+) -> ResumeScore:
+    analysis = await aget_full_analysis(
+        job_description_prompt,
+        resume_bytes,
+        strictness_level,
+        positive_factors,
+        negative_factors,
+    )
+    return analysis.score
+
+
+# NEW: Batched Screening Functions ---
+_BATCH_SCORING_PROMPT = ChatPromptTemplate.from_messages(
         [
-            ("system", """You are an expert AI resume screener. Your task is to evaluate a resume against a job description with extreme conciseness to save tokens.
-            
+            ("system", """You are an expert AI resume screener. Your task is to evaluate EACH of the candidate resumes below against the same job description with extreme conciseness to save tokens.
+
             **Output Rules:**
+            - Return one result per candidate, in the exact order the candidates are listed.
             - For all 'reason' and 'highlights' fields, you MUST provide a single, succinct sentence.
             - Do not speculate or add any information not directly supported by the resume.
             - Calculate a weighted aggregate score: Technical (50%), Experience & Alignment (30%), Soft Skills (20%).
@@ -99,100 +459,295 @@ def process_resume_from_bytes(
             - **Strictness Level ({strictness_level}):** Apply this level of scrutiny.
             - **Positive Factors to reward:** {positive_factors}
             - **Negative Factors to penalize:** {negative_factors}
-            
+
             Provide your assessment in the specified JSON format.
             """),
             ("human", """
             **Job Description:**
             {job_description}
             ---
-            **Candidate Resume Text:**
-            {resume_text}
+            {candidates_block}
             ---
-            Evaluate the resume and provide the structured output, adhering strictly to the conciseness rules.
+            Evaluate every candidate and provide the structured output, adhering strictly to the conciseness rules.
             """)
-        ]
-    )
+    ]
+)
+
+@functools.lru_cache(maxsize=1)
+def _batch_scoring_chain():
+    return _BATCH_SCORING_PROMPT | get_llm().with_structured_output(BatchResumeScores)
 
-    resume_scoring_chain = resume_scoring_prompt | llm.with_structured_output(ResumeScore)
-    resume_score: ResumeScore = resume_scoring_chain.invoke({
+def _build_batch_scoring_call(
+    job_description_prompt: str,
+    resumes: List[Tuple[str, str]],
+    strictness_level: str,
+    positive_factors: Optional[str],
+    negative_factors: Optional[str],
+):
+    """Build the (chain, inputs) pair shared by the sync and async batch scorers."""
+    candidates_block = "\n".join(
+        f"### Candidate {i} ({filename}):\n{resume_text}\n"
+        for i, (filename, resume_text) in enumerate(resumes, start=1)
+    )
+    inputs = {
         "strictness_level": strictness_level,
         "job_description": job_description_prompt,
-        "resume_text": resume_text,
+        "candidates_block": candidates_block,
         "positive_factors": positive_factors or "No specific positive factors provided.",
         "negative_factors": negative_factors or "No specific negative factors provided.",
-    })
+    }
+    return _batch_scoring_chain(), inputs
 
-    # Recalculate aggregate score to ensure consistency with the new weights
+def _reweight_aggregate(score: ResumeScore) -> ResumeScore:
+    # Recalculate the aggregate score to ensure consistency with the weights
     weighted_score = (
-        (resume_score.technical_score * 0.5) +
-        (resume_score.experience_and_alignment_score * 0.3) +
-        (resume_score.softskills_score * 0.2)
+        (score.technical_score * 0.5) +
+        (score.experience_and_alignment_score * 0.3) +
+        (score.softskills_score * 0.2)
     )
-    resume_score.aggregate_score = round(weighted_score, 2)
-    return resume_score
+    score.aggregate_score = round(weighted_score, 2)
+    return score
 
+def _finalize_batch_scores(batch_result: BatchResumeScores, resumes: List[Tuple[str, str]]) -> List[ResumeScore]:
+    if len(batch_result.results) != len(resumes):
+        raise ValueError(
+            f"Batch scoring returned {len(batch_result.results)} results for {len(resumes)} resumes."
+        )
+    return [_reweight_aggregate(score) for score in batch_result.results]
 
-def get_recommendations(candidate_scores: List[Dict[str, Any]], num_recommendations: int) -> RecommendationList:
-    """ Unchanged from original """
-    llm = get_llm()
-    sorted_candidates = sorted([s for s in candidate_scores if 'aggregate_score' in s], key=lambda x: x['aggregate_score'], reverse=True)
-    top_n_candidates = sorted_candidates[:num_recommendations]
-    candidate_data_str = json.dumps(top_n_candidates, indent=2)
+# Structured output on list prompts sometimes returns the wrong number of
+# results; rather than failing the whole batch, mismatched batches fall back
+# to scoring each resume individually through the fused analysis chain.
+def _score_resume_text(
+    job_description_prompt: str,
+    resume_text: str,
+    strictness_level: str,
+    positive_factors: Optional[str],
+    negative_factors: Optional[str],
+) -> ResumeScore:
+    chain, inputs = _build_full_analysis_call(
+        job_description_prompt, resume_text, strictness_level, positive_factors, negative_factors
+    )
+    return _reweight_aggregate(chain.invoke(inputs).score)
+
+async def _ascore_resume_text(
+    job_description_prompt: str,
+    resume_text: str,
+    strictness_level: str,
+    positive_factors: Optional[str],
+    negative_factors: Optional[str],
+) -> ResumeScore:
+    chain, inputs = _build_full_analysis_call(
+        job_description_prompt, resume_text, strictness_level, positive_factors, negative_factors
+    )
+    return _reweight_aggregate((await chain.ainvoke(inputs)).score)
+
+# Exact per-resume cache layer for batch scoring: byte-identical resumes —
+# duplicated within a batch or re-submitted later — are served from the disk
+# cache and only the misses (deduplicated) are sent to the LLM.
+def _prepare_batch_cache(
+    job_description_prompt: str,
+    resumes: List[Tuple[str, str]],
+    strictness_level: str,
+    positive_factors: Optional[str],
+    negative_factors: Optional[str],
+):
+    """Return (scores, pending) where scores holds cache hits (None on miss)
+    and pending maps each missed disk key to the result indices it fills."""
+    scores: List[Optional[ResumeScore]] = []
+    pending: "OrderedDict[str, List[int]]" = OrderedDict()
+    for i, (_, resume_text) in enumerate(resumes):
+        key = _disk_cache_key("batch_score", job_description_prompt, resume_text,
+                              strictness_level, positive_factors, negative_factors)
+        cached = _disk_cache.get(key)
+        if cached is not None:
+            scores.append(ResumeScore.model_validate_json(cached))
+        else:
+            scores.append(None)
+            pending.setdefault(key, []).append(i)
+    return scores, pending
+
+def _fill_batch_cache(
+    scores: List[Optional[ResumeScore]],
+    pending: "OrderedDict[str, List[int]]",
+    fresh: List[ResumeScore],
+) -> List[ResumeScore]:
+    for (key, indices), score in zip(pending.items(), fresh):
+        _disk_cache.set(key, score.model_dump_json(), expire=_DISK_CACHE_TTL_SECONDS)
+        for i in indices:
+            scores[i] = score
+    return scores
+
+def process_resumes_batch(
+    job_description_prompt: str,
+    resumes: List[Tuple[str, str]],
+    strictness_level: str = "medium",
+    positive_factors: Optional[str] = None,
+    negative_factors: Optional[str] = None,
+) -> List[ResumeScore]:
+    """Score several resumes with a single LLM call.
+
+    `resumes` is a list of (filename, resume_text) pairs; the system rules and
+    job description are sent once instead of once per candidate. Resumes with
+    a cached score skip the LLM entirely.
+    """
+    scores, pending = _prepare_batch_cache(
+        job_description_prompt, resumes, strictness_level, positive_factors, negative_factors
+    )
+    if not pending:
+        return scores
+
+    miss_resumes = [resumes[indices[0]] for indices in pending.values()]
+    chain, inputs = _build_batch_scoring_call(
+        job_description_prompt, miss_resumes, strictness_level, positive_factors, negative_factors
+    )
+    batch_result = chain.invoke(inputs)
+    if len(batch_result.results) != len(miss_resumes):
+        fresh = [
+            _score_resume_text(job_description_prompt, resume_text, strictness_level, positive_factors, negative_factors)
+            for _, resume_text in miss_resumes
+        ]
+    else:
+        fresh = _finalize_batch_scores(batch_result, miss_resumes)
+    return _fill_batch_cache(scores, pending, fresh)
+
+# NEW: async variant so callers can overlap several batch calls on the network
+async def aprocess_resumes_batch(
+    job_description_prompt: str,
+    resumes: List[Tuple[str, str]],
+    strictness_level: str = "medium",
+    positive_factors: Optional[str] = None,
+    negative_factors: Optional[str] = None,
+) -> List[ResumeScore]:
+    """Async counterpart of process_resumes_batch using the LLM's non-blocking IO."""
+    scores, pending = _prepare_batch_cache(
+        job_description_prompt, resumes, strictness_level, positive_factors, negative_factors
+    )
+    if not pending:
+        return scores
+
+    miss_resumes = [resumes[indices[0]] for indices in pending.values()]
+    chain, inputs = _build_batch_scoring_call(
+        job_description_prompt, miss_resumes, strictness_level, positive_factors, negative_factors
+    )
+    batch_result = await chain.ainvoke(inputs)
+    if len(batch_result.results) != len(miss_resumes):
+        fresh = list(await asyncio.gather(*[
+            _ascore_resume_text(job_description_prompt, resume_text, strictness_level, positive_factors, negative_factors)
+            for _, resume_text in miss_resumes
+        ]))
+    else:
+        fresh = _finalize_batch_scores(batch_result, miss_resumes)
+    return _fill_batch_cache(scores, pending, fresh)
+
+
+@functools.lru_cache(maxsize=1)
+def _recommendation_chain():
     recommendation_prompt = ChatPromptTemplate.from_messages(
         [
             ("system", "You are an AI HR assistant. Based on the sorted list of candidates, provide exactly {num_recommendations} recommendations with concise reasons."),
             ("human", "Candidate Scores: {candidate_data}"),
         ]
     )
-    recommendation_chain = recommendation_prompt | llm.with_structured_output(RecommendationList)
-    recommendations: RecommendationList = recommendation_chain.invoke(
+    return recommendation_prompt | get_llm().with_structured_output(RecommendationList)
+
+def get_recommendations(
+    candidate_scores: List[Dict[str, Any]],
+    num_recommendations: int,
+    narrative: bool = False,
+) -> RecommendationList:
+    """Pick the top-N candidates by aggregate score.
+
+    By default the reasons are synthesized locally from the scores the
+    screening step already produced; the LLM is only called when `narrative`
+    is set and free-form rationales are explicitly wanted.
+    """
+    # O(N log k) top-N instead of sorting the full list
+    top_n_candidates = heapq.nlargest(
+        num_recommendations,
+        [s for s in candidate_scores if 'aggregate_score' in s],
+        key=lambda x: x['aggregate_score'],
+    )
+    if not narrative:
+        return RecommendationList(recommendations=[
+            CandidateRecommendation(
+                name=s.get('name', 'Unknown'),
+                score=s['aggregate_score'],
+                reason=(
+                    f"Strong technical ({s.get('technical_score', 'n/a')}/10) and "
+                    f"experience & alignment ({s.get('experience_and_alignment_score', 'n/a')}/10) "
+                    f"scores, soft skills {s.get('softskills_score', 'n/a')}/10."
+                ),
+            )
+            for s in top_n_candidates
+        ])
+
+    candidate_data_str = json.dumps(top_n_candidates, indent=2)
+    recommendations: RecommendationList = _recommendation_chain().invoke(
         {"candidate_data": candidate_data_str, "num_recommendations": num_recommendations}
     )
     return recommendations
 
 # --- UPDATED MODULE FUNCTIONS for Conciseness ---
+# Prompt | structured-output chains are immutable, so each is built once per
+# process (lazily, because get_llm needs the API key) and reused across calls.
 
-def detect_red_flags(resume_text: str) -> RedFlags:
-    llm = get_llm()
+@functools.lru_cache(maxsize=1)
+def _red_flags_chain():
     prompt = ChatPromptTemplate.from_messages(
         [
             ("system", "You are an HR compliance AI. Analyze the resume for red flags (job hopping, gaps, buzzwords, inconsistencies). Provide a boolean `red_flags_found` and a concise, single-paragraph summary (max 80 words) of your findings."),
             ("human", "Resume Text: {resume_text}"),
         ]
     )
-    chain = prompt | llm.with_structured_output(RedFlags)
-    return chain.invoke({"resume_text": resume_text})
+    return prompt | get_llm().with_structured_output(RedFlags)
 
-def estimate_salary(job_description: str, resume_text: str) -> SalaryEstimation:
-    llm = get_llm()
+def detect_red_flags(resume_text: str) -> RedFlags:
+    chain = _red_flags_chain()
+    return _disk_cached(RedFlags, _disk_cache_key("red_flags", resume_text),
+                        lambda: chain.invoke({"resume_text": resume_text}))
+
+@functools.lru_cache(maxsize=1)
+def _salary_estimation_chain():
     prompt = ChatPromptTemplate.from_messages(
         [
             ("system", "You are a salary estimation AI. Based on the job and resume, provide an estimated annual salary range in India. Then, provide a concise, single-paragraph summary (max 80 words) justifying your estimate."),
             ("human", "Job Description: {job_description}\nResume Text: {resume_text}"),
         ]
     )
-    chain = prompt | llm.with_structured_output(SalaryEstimation)
-    return chain.invoke({"job_description": job_description, "resume_text": resume_text})
+    return prompt | get_llm().with_structured_output(SalaryEstimation)
 
-def check_background_consistency(resume_text: str) -> ConsistencyCheck:
-    llm = get_llm()
+def estimate_salary(job_description: str, resume_text: str) -> SalaryEstimation:
+    chain = _salary_estimation_chain()
+    return _disk_cached(SalaryEstimation, _disk_cache_key("salary_estimation", job_description, resume_text),
+                        lambda: chain.invoke({"job_description": job_description, "resume_text": resume_text}))
+
+@functools.lru_cache(maxsize=1)
+def _consistency_chain():
     prompt = ChatPromptTemplate.from_messages(
         [
             ("system", "You are an HR verification AI. Analyze the resume for inconsistencies in education, job titles, and dates. Provide a boolean `inconsistencies_found` and a concise, single-paragraph summary (max 80 words) of your findings."),
             ("human", "Resume Text: {resume_text}"),
         ]
     )
-    chain = prompt | llm.with_structured_output(ConsistencyCheck)
-    return chain.invoke({"resume_text": resume_text})
+    return prompt | get_llm().with_structured_output(ConsistencyCheck)
 
-def calculate_fit_score(job_description: str, resume_text: str) -> FitScore:
-    llm = get_llm()
+def check_background_consistency(resume_text: str) -> ConsistencyCheck:
+    chain = _consistency_chain()
+    return _disk_cached(ConsistencyCheck, _disk_cache_key("background_consistency", resume_text),
+                        lambda: chain.invoke({"resume_text": resume_text}))
+
+@functools.lru_cache(maxsize=1)
+def _fit_score_chain():
     prompt = ChatPromptTemplate.from_messages(
         [
             ("system", "You are a candidate fit AI. Provide a Role Fit score (0-10) and a Culture Fit score (0-10). Then, provide a concise, single-paragraph summary (max 80 words) explaining your overall assessment."),
             ("human", "Job Description: {job_description}\nResume Text: {resume_text}"),
         ]
     )
-    chain = prompt | llm.with_structured_output(FitScore)
-    return chain.invoke({"job_description": job_description, "resume_text": resume_text})
\ No newline at end of file
+    return prompt | get_llm().with_structured_output(FitScore)
+
+def calculate_fit_score(job_description: str, resume_text: str) -> FitScore:
+    chain = _fit_score_chain()
+    return _disk_cached(FitScore, _disk_cache_key("candidate_fit", job_description, resume_text),
+                        lambda: chain.invoke({"job_description": job_description, "resume_text": resume_text}))
\ No newline at end of file
@@ -3,7 +3,7 @@ REM This script starts the resume screener application.
 
 ECHO Starting Flask Backend Server...
 REM The "/B" flag starts the application in the background in a new window.
-start "Backend" /B cmd /c ".\venv\Scripts\activate && python app.py"
+start "Backend" /B cmd /c ".\venv\Scripts\activate && uvicorn app:asgi_app --port 5000"
 
 ECHO Starting Streamlit Frontend Dashboard...
 REM This starts the frontend and will open your web browser.
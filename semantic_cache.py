@@ -0,0 +1,86 @@
+# semantic_cache.py
+# Lightweight in-process semantic cache for LLM responses: queries are embedded
+# with a small sentence-transformer and matched against cached entries by
+# cosine similarity, so near-identical (JD, resume) pairs skip the LLM call.
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+import numpy as np
+
+try:
+    from sentence_transformers import SentenceTransformer
+except ImportError:  # sentence-transformers is optional; cache disables itself
+    SentenceTransformer = None
+
+EMBEDDING_MODEL_NAME = "all-MiniLM-L6-v2"
+
+
+class SemanticCache:
+    """Maps query text -> cached response string via embedding similarity.
+
+    Strictly best-effort: the embedding model is loaded in a background
+    thread (first use may download it from the Hugging Face hub), lookups
+    miss until it is ready, and any load or encode failure permanently
+    disables the cache instead of surfacing on the request path.
+    """
+
+    def __init__(self, threshold: float = 0.92, max_entries: int = 512):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, str]" = OrderedDict()  # query text -> response
+        self._embeddings: Optional[np.ndarray] = None  # row-aligned with _entries
+        self._model = None
+        self._failed = SentenceTransformer is None
+        self._lock = threading.Lock()
+        if not self._failed:
+            threading.Thread(target=self._load_model, daemon=True).start()
+
+    def _load_model(self):
+        try:
+            self._model = SentenceTransformer(EMBEDDING_MODEL_NAME)
+        except Exception:
+            self._failed = True
+
+    @property
+    def enabled(self) -> bool:
+        return not self._failed and self._model is not None
+
+    def _embed(self, text: str) -> np.ndarray:
+        embedding = self._model.encode([text], show_progress_bar=False)[0]
+        norm = np.linalg.norm(embedding)
+        return embedding / norm if norm else embedding
+
+    def get(self, query_text: str) -> Optional[str]:
+        """Return the cached response whose query is most similar, or None."""
+        if not self.enabled or self._embeddings is None or not len(self._entries):
+            return None
+        try:
+            query_embedding = self._embed(query_text)
+            with self._lock:
+                similarities = self._embeddings @ query_embedding
+                best = int(np.argmax(similarities))
+                if similarities[best] >= self.threshold:
+                    return list(self._entries.values())[best]
+        except Exception:
+            self._failed = True
+        return None
+
+    def set(self, query_text: str, response: str) -> None:
+        if not self.enabled:
+            return
+        try:
+            query_embedding = self._embed(query_text)
+            with self._lock:
+                if query_text in self._entries:
+                    return
+                self._entries[query_text] = response
+                if self._embeddings is None:
+                    self._embeddings = query_embedding[np.newaxis, :]
+                else:
+                    self._embeddings = np.vstack([self._embeddings, query_embedding])
+                if len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self._embeddings = self._embeddings[1:]
+        except Exception:
+            self._failed = True